@@ -22,11 +22,12 @@ Design notes (why this version differs from the old one):
 """
 
 import argparse
+import mmap
 import os
 import re
 import sys
 from datetime import datetime, date, timezone, timedelta
-from typing import List, Optional, Pattern, Tuple
+from typing import Callable, List, Optional, Pattern, Tuple
 
 # ---- Optional dependency: dateutil (fuzzy fallback only) ---------------------------
 try:
@@ -37,14 +38,15 @@ except Exception:
 # ------------------------------------------------------------------------------------
 # ANSI colors
 
+# Stored as bytes so highlighting splices them into raw lines as-is.
 COLOR_CODES = {
-    "reset": "\x1b[0m",
-    "cyan": "\x1b[36m",
-    "yellow": "\x1b[33m",
-    "green": "\x1b[32m",
-    "red": "\x1b[31m",
-    "magenta": "\x1b[35m",
-    "blue": "\x1b[34m",
+    "reset": b"\x1b[0m",
+    "cyan": b"\x1b[36m",
+    "yellow": b"\x1b[33m",
+    "green": b"\x1b[32m",
+    "red": b"\x1b[31m",
+    "magenta": b"\x1b[35m",
+    "blue": b"\x1b[34m",
 }
 
 
@@ -52,8 +54,8 @@ def ansi_enabled() -> bool:
     return sys.stdout.isatty() and not os.environ.get("NO_COLOR")
 
 
-def colorize(text: str, color: str) -> str:
-    return f"{COLOR_CODES.get(color, COLOR_CODES['cyan'])}{text}{COLOR_CODES['reset']}"
+def colorize(text: bytes, color: str) -> bytes:
+    return COLOR_CODES.get(color, COLOR_CODES["cyan"]) + text + COLOR_CODES["reset"]
 
 
 # ------------------------------------------------------------------------------------
@@ -68,13 +70,14 @@ MIN_DETECT_HITS = 3            # a format needs at least this many parsed hits t
 PROBE_SCAN_BYTES = 65536       # max bytes to scan forward past unparseable lines per probe
 OUT_OF_RANGE_LIMIT = 5         # consecutive trusted out-of-range lines before early exit
 ANCHOR_SCAN_LINES = 2000       # lines scanned when hunting for a date anchor
+OUTPUT_FLUSH_BYTES = 1 << 20   # matched output is batched and written in chunks this size
 
 
 # ------------------------------------------------------------------------------------
 # Known timestamp formats
 
 class FormatSpec:
-    __slots__ = ("name", "regex", "strptime_variants", "has_year")
+    __slots__ = ("name", "regex", "strptime_variants", "has_year", "fast_parse")
 
     def __init__(
         self,
@@ -82,25 +85,113 @@ class FormatSpec:
         regex: Pattern,
         strptime_variants: Optional[List[str]],
         has_year: bool = True,
+        fast_parse: Optional[Callable[[str], Optional[datetime]]] = None,
     ):
         self.name = name
         self.regex = regex
         self.strptime_variants = strptime_variants  # None means epoch, handled by parse_epoch
         self.has_year = has_year
+        # Optional slicing parser tried before strptime; returns None to defer.
+        self.fast_parse = fast_parse
+
+
+# Fixed-width formats are parsed by slicing digits straight into datetime().
+# strptime re-parses its format string and goes through locale-aware
+# machinery on every call, which dominates the per-line cost of a scan.
+
+def _parse_fraction(frac: str) -> Optional[int]:
+    """Microseconds from the 1-6 digits after the seconds, padded like %f."""
+    n = len(frac)
+    if not 1 <= n <= 6 or not frac.isdigit():
+        return None
+    return int(frac) * 10 ** (6 - n)
+
+
+def _fast_parse_fix(text: str) -> Optional[datetime]:
+    """YYYYMMDD-HH:MM:SS[.ffffff]
+
+    Must agree with the strptime variants it shortcuts:
+
+    >>> fix = next(f for f in KNOWN_FORMATS if f.name == "fix")
+    >>> samples = ["20260428-06:00:33.450", "20260428-06:00:33.4",
+    ...            "20260428-06:00:33.123456", "20260428-06:00:33", "20260230-06:00:33"]
+    >>> [_fast_parse_fix(t) == _try_strptime(t, fix) for t in samples]
+    [True, True, True, True, True]
+    """
+    n = len(text)
+    if n < 17 or text[8] != "-" or text[11] != ":" or text[14] != ":":
+        return None
+    us = 0
+    if n > 17:
+        if text[17] != ".":
+            return None
+        us = _parse_fraction(text[18:])
+        if us is None:
+            return None
+    try:
+        return datetime(
+            int(text[0:4]), int(text[4:6]), int(text[6:8]),
+            int(text[9:11]), int(text[12:14]), int(text[15:17]), us,
+        )
+    except ValueError:
+        return None
+
+
+def _fast_parse_iso(text: str) -> Optional[datetime]:
+    """YYYY-MM-DD[T ]HH:MM:SS[.,ffffff][Z]; numeric offsets defer to strptime.
+
+    Must agree with the strptime variants it shortcuts:
+
+    >>> iso_t = next(f for f in KNOWN_FORMATS if f.name == "iso8601_T")
+    >>> samples = ["2025-08-08T13:23:00.000Z", "2025-08-08T13:23:00Z",
+    ...            "2025-08-08T13:23:00.5", "2025-08-08T13:23:00"]
+    >>> [_fast_parse_iso(t) == _try_strptime(t, iso_t) for t in samples]
+    [True, True, True, True]
+    >>> iso_space = next(f for f in KNOWN_FORMATS if f.name == "iso8601_space")
+    >>> samples = ["2025-08-08 13:23:00,123", "2025-08-08 13:23:00.123456",
+    ...            "2025-08-08 13:23:00", "2025-02-30 13:23:00"]
+    >>> [_fast_parse_iso(t) == _try_strptime(t, iso_space) for t in samples]
+    [True, True, True, True]
+    >>> _fast_parse_iso("2025-08-08T13:23:00.000+05:30") is None
+    True
+    """
+    tz = None
+    if text.endswith("Z"):
+        # strptime's %z maps a bare Z to UTC as well
+        text = text[:-1]
+        tz = timezone.utc
+    n = len(text)
+    if n < 19 or text[4] != "-" or text[7] != "-" or text[13] != ":" or text[16] != ":":
+        return None
+    us = 0
+    if n > 19:
+        if text[19] not in ".,":
+            return None
+        us = _parse_fraction(text[20:])
+        if us is None:
+            return None
+    try:
+        return datetime(
+            int(text[0:4]), int(text[5:7]), int(text[8:10]),
+            int(text[11:13]), int(text[14:16]), int(text[17:19]), us, tz,
+        )
+    except ValueError:
+        return None
 
 
 KNOWN_FORMATS: List[FormatSpec] = [
     # FIX protocol compact: 20260428-06:00:33.450
     FormatSpec(
         "fix",
-        re.compile(r"(?<!\d)(\d{8}-\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)"),
+        re.compile(rb"(?<!\d)(\d{8}-\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?)"),
         ["%Y%m%d-%H:%M:%S.%f", "%Y%m%d-%H:%M:%S"],
+        fast_parse=_fast_parse_fix,
     ),
     # ISO 8601 with T separator: 2025-08-08T13:23:00.000Z or ...+05:30
     FormatSpec(
         "iso8601_T",
         re.compile(
-            r"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?(?:Z|[+-]\d{2}:?\d{2})?)"
+            rb"(\d{4}-\d{2}-\d{2}T\d{2}:\d{2}:\d{2}(?:\.\d{1,6})?(?:Z|[+-]\d{2}:?\d{2})?)"
         ),
         [
             "%Y-%m-%dT%H:%M:%S.%f%z",
@@ -108,23 +199,25 @@ KNOWN_FORMATS: List[FormatSpec] = [
             "%Y-%m-%dT%H:%M:%S.%f",
             "%Y-%m-%dT%H:%M:%S",
         ],
+        fast_parse=_fast_parse_iso,
     ),
     # ISO 8601 with space separator, plus Log4j comma millis: 2025-08-08 13:23:00,123
     FormatSpec(
         "iso8601_space",
-        re.compile(r"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:[.,]\d{1,6})?)"),
+        re.compile(rb"(\d{4}-\d{2}-\d{2} \d{2}:\d{2}:\d{2}(?:[.,]\d{1,6})?)"),
         ["%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d %H:%M:%S,%f", "%Y-%m-%d %H:%M:%S"],
+        fast_parse=_fast_parse_iso,
     ),
     # Apache/NCSA: 31/Aug/1995:20:00:00 -0400
     FormatSpec(
         "apache",
-        re.compile(r"\[?(\d{1,2}/[A-Za-z]{3}/\d{4}:\d{2}:\d{2}:\d{2}(?:\s[+-]\d{4})?)\]?"),
+        re.compile(rb"\[?(\d{1,2}/[A-Za-z]{3}/\d{4}:\d{2}:\d{2}:\d{2}(?:\s[+-]\d{4})?)\]?"),
         ["%d/%b/%Y:%H:%M:%S %z", "%d/%b/%Y:%H:%M:%S"],
     ),
     # Syslog: Aug  8 13:23:00 (no year, needs the date anchor)
     FormatSpec(
         "syslog",
-        re.compile(r"([A-Za-z]{3}\s{1,2}\d{1,2} \d{2}:\d{2}:\d{2})"),
+        re.compile(rb"([A-Za-z]{3}\s{1,2}\d{1,2} \d{2}:\d{2}:\d{2})"),
         ["%b %d %H:%M:%S"],
         has_year=False,
     ),
@@ -132,13 +225,13 @@ KNOWN_FORMATS: List[FormatSpec] = [
     # so an order ID cannot outrank a real timestamp during detection)
     FormatSpec(
         "epoch_ms",
-        re.compile(r"(?<!\d)(\d{13})(?!\d)"),
+        re.compile(rb"(?<!\d)(\d{13})(?!\d)"),
         None,
     ),
     # Unix epoch seconds: 1234567890
     FormatSpec(
         "epoch_s",
-        re.compile(r"(?<!\d)(\d{10})(?!\d)"),
+        re.compile(rb"(?<!\d)(\d{10})(?!\d)"),
         None,
     ),
 ]
@@ -262,40 +355,58 @@ class Extractor:
     def __init__(self, fmt: Optional[FormatSpec], user_pattern: Optional[Pattern]):
         self.fmt = fmt
         self.user_pattern = user_pattern
+        # extract() runs on every scanned line, so resolve which regex wins
+        # once here instead of re-checking user_pattern/fmt per call. The
+        # built-in formats are ASCII bytes patterns; a user pattern stays str
+        # so \w, \d, \N{...} and non-ASCII literals keep their Unicode meaning.
+        self._user_search = user_pattern.search if user_pattern is not None else None
+        if user_pattern is None and fmt is not None:
+            self._search = fmt.regex.search
+        else:
+            self._search = None
 
-    def extract(self, line: str) -> Optional[str]:
-        if self.user_pattern is not None:
-            m = self.user_pattern.search(line)
-            return m.group(1) if m else None
-        if self.fmt is not None:
-            m = self.fmt.regex.search(line)
+    def extract(self, line: bytes) -> Optional[bytes]:
+        search = self._search
+        if search is not None:
+            m = search(line)
             return m.group(1) if m else None
+        user_search = self._user_search
+        if user_search is not None:
+            m = user_search(line.decode("utf-8", errors="ignore"))
+            ts_text = m.group(1) if m else None
+            return ts_text.encode("utf-8") if ts_text is not None else None
         # Fallback for undetected formats: find an HH:MM:SS core and grab
         # leading context for the date prefix. Trailing context is capped at
         # 10 chars (room for a timezone offset) so message body does not
-        # poison the fuzzy parse.
-        m = TIME_CORE_RE.search(line)
+        # poison the fuzzy parse. The windows count characters, so slice the
+        # decoded text; this path feeds dateutil, which dwarfs the decode.
+        text = line.decode("utf-8", errors="ignore")
+        m = TIME_CORE_RE.search(text)
         if m:
             start = max(0, m.start() - 40)
-            end = min(len(line), m.end() + 10)
-            return line[start:end].strip()
+            end = min(len(text), m.end() + 10)
+            return text[start:end].strip().encode("utf-8")
         return None
 
 
 def parse_line_timestamp(
-    ts_text: str,
+    ts_raw: bytes,
     date_anchor: Optional[date],
     fmt: Optional[FormatSpec],
     strptime_format: Optional[str],
     default_tz: Optional[timezone],
 ) -> Tuple[Optional[datetime], bool]:
-    """Parse an extracted timestamp string.
+    """Parse an extracted timestamp.
+
+    Lines stay bytes end to end; only the short extracted timestamp is
+    decoded here, never the whole line.
 
     Returns (datetime_or_None, trusted). trusted is True when the parse came
     from a user-supplied format or the detected FormatSpec, False when it
     came from the fuzzy fallback. Only trusted parses may trigger the early
     exit in the print loop.
     """
+    ts_text = ts_raw.decode("utf-8", errors="ignore")
     if strptime_format is not None:
         try:
             return normalize_datetime(datetime.strptime(ts_text, strptime_format), default_tz), True
@@ -305,7 +416,9 @@ def parse_line_timestamp(
         if fmt.strptime_variants is None:
             dt = parse_epoch(ts_text.strip())
         else:
-            dt = _try_strptime(ts_text, fmt)
+            dt = fmt.fast_parse(ts_text) if fmt.fast_parse is not None else None
+            if dt is None:
+                dt = _try_strptime(ts_text, fmt)
         if dt is None:
             return None, False
         if not fmt.has_year and date_anchor is not None:
@@ -346,7 +459,7 @@ def detect_format(path: str) -> Optional[FormatSpec]:
     reported on stderr so the user can see it and override it.
     """
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        with open(path, "rb") as f:
             lines = []
             for _ in range(DETECT_SAMPLE_LINES):
                 line = f.readline()
@@ -365,10 +478,11 @@ def detect_format(path: str) -> Optional[FormatSpec]:
             m = fmt.regex.search(line)
             if not m:
                 continue
+            ts_text = m.group(1).decode("utf-8", errors="ignore")
             if fmt.strptime_variants is None:
-                if parse_epoch(m.group(1)) is not None:
+                if parse_epoch(ts_text) is not None:
                     hits += 1
-            elif _try_strptime(m.group(1), fmt) is not None:
+            elif _try_strptime(ts_text, fmt) is not None:
                 hits += 1
         if hits:
             scores[fmt.name] = (hits, fmt)
@@ -405,10 +519,15 @@ def detect_format(path: str) -> Optional[FormatSpec]:
 # ------------------------------------------------------------------------------------
 # File machinery
 
-def file_size(path: str) -> int:
-    with open(path, "rb") as f:
-        f.seek(0, 2)
-        return f.tell()
+def _madvise(mm: mmap.mmap, advice: str) -> None:
+    """Best-effort access-pattern hint; madvise and its flags are platform-specific."""
+    option = getattr(mmap, advice, None)
+    if option is None or not hasattr(mm, "madvise"):
+        return
+    try:
+        mm.madvise(option)
+    except OSError:
+        pass
 
 
 def find_first_date_anchor(
@@ -419,14 +538,15 @@ def find_first_date_anchor(
     default_tz: Optional[timezone],
 ) -> Optional[date]:
     try:
-        with open(path, "r", encoding="utf-8", errors="ignore") as f:
+        with open(path, "rb") as f:
             for _ in range(ANCHOR_SCAN_LINES):
                 line = f.readline()
                 if not line:
                     break
-                ts_text = extractor.extract(line)
-                if not ts_text:
+                ts_raw = extractor.extract(line)
+                if not ts_raw:
                     continue
+                ts_text = ts_raw.decode("utf-8", errors="ignore")
                 if fmt is not None and not fmt.has_year:
                     # Year-less formats: dateutil supplies the current year;
                     # without dateutil, assume the current year outright.
@@ -439,7 +559,7 @@ def find_first_date_anchor(
                     if dt is not None:
                         return dt.replace(year=datetime.now().year).date()
                 else:
-                    dt, _ = parse_line_timestamp(ts_text, None, fmt, strptime_format, default_tz)
+                    dt, _ = parse_line_timestamp(ts_raw, None, fmt, strptime_format, default_tz)
                     if dt:
                         return dt.date()
     except Exception:
@@ -448,7 +568,7 @@ def find_first_date_anchor(
 
 
 def binary_search_start(
-    path: str,
+    mm: mmap.mmap,
     target: datetime,
     extractor: Extractor,
     date_anchor: Optional[date],
@@ -465,42 +585,40 @@ def binary_search_start(
     costs a little extra scanning in the print loop, while the old behavior
     (treating unparseable as "before target") could overshoot and silently
     drop matching lines.
+
+    The file is probed through a read-only mmap: each probe backs up to the
+    start of the line containing mid and walks lines with find(), so a probe
+    costs no read() syscalls or buffered-reader state.
     """
     low = 0
-    hi = file_size(path)
-    with open(path, "rb") as f:
-        while low < hi:
-            mid = (low + hi) // 2
-            f.seek(mid)
-            if mid > 0:
-                f.readline()  # discard the partial line the seek landed in
-            pos = f.tell()
-            found = None
-            scanned = 0
-            while pos < hi and scanned < PROBE_SCAN_BYTES:
-                raw = f.readline()
-                if not raw:
+    hi = len(mm)
+    while low < hi:
+        mid = (low + hi) // 2
+        pos = mm.rfind(b"\n", 0, mid) + 1  # start of the line containing mid
+        found = None
+        scanned = 0
+        while pos < hi and scanned < PROBE_SCAN_BYTES:
+            line_end = mm.find(b"\n", pos)
+            next_pos = len(mm) if line_end < 0 else line_end + 1
+            raw = mm[pos:next_pos]
+            ts_text = extractor.extract(raw)
+            if ts_text:
+                ts, _ = parse_line_timestamp(
+                    ts_text, date_anchor, fmt, strptime_format, default_tz
+                )
+                if ts is not None:
+                    found = (ts, next_pos)
                     break
-                next_pos = f.tell()
-                s = raw.decode("utf-8", errors="ignore")
-                ts_text = extractor.extract(s)
-                if ts_text:
-                    ts, _ = parse_line_timestamp(
-                        ts_text, date_anchor, fmt, strptime_format, default_tz
-                    )
-                    if ts is not None:
-                        found = (ts, next_pos)
-                        break
-                scanned += len(raw)
-                pos = next_pos
-            if found is None:
-                hi = mid
+            scanned += len(raw)
+            pos = next_pos
+        if found is None:
+            hi = mid
+        else:
+            ts, next_pos = found
+            if ts < target:
+                low = next_pos
             else:
-                ts, next_pos = found
-                if ts < target:
-                    low = next_pos
-                else:
-                    hi = mid
+                hi = mid
     return low
 
 
@@ -569,12 +687,6 @@ def print_range(
         if end_dt < start_dt:
             start_dt, end_dt = end_dt, start_dt
 
-    start_pos = 0
-    if input_order != "unsorted":
-        start_pos = binary_search_start(
-            path, start_dt, extractor, date_anchor, fmt, timestamp_format, default_tz
-        )
-
     # Early exit is only safe when timestamps come from a trusted parser and
     # several consecutive lines agree; a single fuzzy misparse must not end
     # the scan.
@@ -584,11 +696,40 @@ def print_range(
     in_range = False
     consecutive_past_end = 0
 
+    # Matched lines are collected and written in large chunks: one write per
+    # line costs a trip through the text layer each time, which shows up
+    # once the window covers more than a few thousand lines. A terminal gets
+    # every match as soon as it is found instead; the binary stream under
+    # sys.stdout is not line-buffered, so it is flushed explicitly.
+    stream = sys.stdout.buffer
+    interactive = sys.stdout.isatty()
+    flush_at = 0 if interactive else OUTPUT_FLUSH_BYTES
+    out = []
+    out_size = 0
+
     with open(path, "rb") as f:
+        start_pos = 0
+        # mmap refuses empty files, and an empty file has nothing to search.
+        if input_order != "unsorted" and os.fstat(f.fileno()).st_size > 0:
+            # The mapping only lives for the binary search. The scan reads
+            # through f, so a log truncated mid-scan (copytruncate rotation)
+            # just hits EOF instead of faulting with SIGBUS, and lines
+            # appended after startup are still picked up.
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                # Probes touch a handful of scattered pages; readahead around
+                # each one would pull in megabytes of a cold file for nothing.
+                _madvise(mm, "MADV_RANDOM")
+                start_pos = binary_search_start(
+                    mm, start_dt, extractor, date_anchor, fmt, timestamp_format, default_tz
+                )
+        # The buffered file iterator splits lines in C and is several
+        # times cheaper per line than find() plus slicing on the mapping.
+        # Only lines that are actually emitted reach the append/flush
+        # tail of the loop.
+        extract = extractor.extract
         f.seek(start_pos)
-        for raw in f:
-            line = raw.decode("utf-8", errors="ignore")
-            ts_text = extractor.extract(line)
+        for line in f:
+            ts_text = extract(line)
             ts = None
             trusted = False
             if ts_text:
@@ -599,25 +740,35 @@ def print_range(
                 # Continuation line (stack trace, wrapped message, payload).
                 # It belongs to the last timestamped line; print it when that
                 # line was in range.
-                if in_range:
-                    sys.stdout.write(line)
-                continue
-            if start_dt <= ts <= end_dt:
+                if not in_range:
+                    continue
+            elif start_dt <= ts <= end_dt:
                 in_range = True
                 consecutive_past_end = 0
-                if do_color and ts_text:
+                if do_color:
                     line = line.replace(ts_text, colorize(ts_text, color), 1)
-                sys.stdout.write(line)
             elif ts > end_dt:
                 in_range = False
                 if allow_early_exit and trusted:
                     consecutive_past_end += 1
                     if consecutive_past_end >= OUT_OF_RANGE_LIMIT:
                         break
+                continue
             else:
                 # Before the range (binary search deliberately undershoots).
                 in_range = False
                 consecutive_past_end = 0
+                continue
+            out.append(line)
+            out_size += len(line)
+            if out_size >= flush_at:
+                stream.write(b"".join(out))
+                out.clear()
+                out_size = 0
+                if interactive:
+                    stream.flush()
+    if out:
+        stream.write(b"".join(out))
 
 
 # ------------------------------------------------------------------------------------